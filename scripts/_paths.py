@@ -0,0 +1,23 @@
+from pathlib import Path
+
+# --- Configuration ---
+# File paths shared by the scripts, based on the project's directory structure
+PROJECT_DIR = Path(__file__).resolve().parent.parent
+DATA_DIR = PROJECT_DIR / "data"
+
+# Event calendar and the crawl targets generated from it
+KWO_TERMINKALENDER_CSV_PATH = DATA_DIR / "kwo_terminkalender_2025.csv"
+PROCESSED_CSV_PATH = DATA_DIR / "kwo_terminkalender_2025_processed.csv"
+CRAWL_TARGETS_JSON_PATH = DATA_DIR / "crawl_targets_2025.json"
+FILE_HASH_CACHE_PATH = DATA_DIR / "kwo_terminkalender_2025_file_hashes.json"
+
+# Crawler inputs and outputs
+CRAWL_TARGETS_PATH = DATA_DIR / "crawl_targets.json"
+MONITORING_TARGETS_PATH = DATA_DIR / "monitoring_targets.json"
+STAGING_DIR = DATA_DIR / "staging"
+PDF_CACHE_DIR = DATA_DIR / "pdf_cache"
+MASTER_CSV_PATH = DATA_DIR / "ski-data.csv"
+
+# JSON schemas describing the data files
+SCHEMAS_DIR = PROJECT_DIR / "schemas"
+CRAWL_TARGET_SCHEMA_PATH = SCHEMAS_DIR / "CrawlTarget.schema.json"
@@ -1,16 +1,41 @@
 import os
-import json
+import re
+import hashlib
+import orjson
 import requests
+import fastjsonschema
 import argparse
-import google.generativeai as genai
+import functools
+import itertools
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timezone
-
-# --- Configuration ---
-# Define file paths using the project's directory structure
-project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-CRAWL_TARGETS_PATH = os.path.join(project_dir, "data", "crawl_targets.json")
-MONITORING_TARGETS_PATH = os.path.join(project_dir, "data", "monitoring_targets.json")
-STAGING_DIR = os.path.join(project_dir, "data", "staging")
+from _paths import CRAWL_TARGETS_PATH, MONITORING_TARGETS_PATH, STAGING_DIR, PDF_CACHE_DIR, CRAWL_TARGET_SCHEMA_PATH
+
+# --- Crawl Settings ---
+MAX_TARGETS_PER_RUN = 10
+# Several PDFs are sent per Gemini request to share the cost of the prompt.
+TARGETS_PER_REQUEST = 4
+# Inline Gemini requests are limited to 20 MB and PDFs are base64-encoded on the wire.
+MAX_REQUEST_PDF_BYTES = 14 * 1024 * 1024
+# Downloads and Gemini calls are I/O-bound, so several of each can be in flight at once.
+MAX_CONCURRENT_DOWNLOADS = 8
+MAX_CONCURRENT_REQUESTS = 4
+# (connect, read) timeouts in seconds for PDF downloads.
+DOWNLOAD_TIMEOUT = (5, 30)
+# Read size for streamed downloads; much larger than requests' 10 kB default.
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+
+# --- HTTP Session ---
+# All PDFs are hosted on the same server, so a shared session lets the worker threads
+# reuse keep-alive connections instead of paying a new TCP/TLS handshake per target.
+SESSION = requests.Session()
+SESSION.mount("https://", HTTPAdapter(
+    pool_connections=1,
+    pool_maxsize=MAX_CONCURRENT_DOWNLOADS,
+    max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504])
+))
 
 # --- System & User Prompt Definitions ---
 
@@ -19,10 +44,12 @@ SYSTEM_INSTRUCTION = """You are an expert data extraction agent specializing in
 **Core Capabilities & Rules:**
 1.  **Context Awareness:** You understand that contextual information like `RaceName`, `Date`, and `Location` is often located in the page header, and a `Category` (e.g., U12, U14) is often a sub-header for a group of athletes. You must correctly associate this context with each individual result row.
 2.  **Accuracy:** Every row of your CSV output must correspond directly to an actual result entry found within the provided document. Do not invent or infer data that is not present.
-3.  **Strict Formatting:** You must adhere to the following CSV output format.
+3.  **Multiple Documents:** Each document is preceded by a label of the form `--- FILE ID: <id> ---`. Extract the results of every document separately and never mix rows from different documents.
+4.  **Strict Formatting:** You must adhere to the following CSV output format.
 
 **CSV Output Specification:**
--   **Headers:** The very first line of your response must be the CSV header row: `Name,Category,RaceName,Event,Location,Rank,Date`. Do not omit it.
+-   **Result Blocks:** For every document, output a line of the form `=== <id> ===` containing the document's file ID, followed by the CSV data for that document. Output a block for every document, even if it contains no matching results.
+-   **Headers:** The first line after each `=== <id> ===` line must be the CSV header row: `Name,Category,RaceName,Event,Location,Rank,Date`. Do not omit it.
 -   **Date Format:** The `Date` column must always be in `YYYY-MM-DD` format.
 -   **Special Ranks:** Use `DNS` for 'Did not start' and `DNF` for 'Did not finish' in the `Rank` column.
 -   **CSV Quoting:** If a value in any field (like `RaceName` or `Location`) contains a comma, you **must** enclose that value in double quotes (`"`) to ensure the CSV format remains valid. For example, a race named `My Race, Part 2` should be written as `"My Race, Part 2"`.
@@ -30,10 +57,10 @@ SYSTEM_INSTRUCTION = """You are an expert data extraction agent specializing in
 -   **Example Row:** `Alessio Miggiano,U12,"Grossegg-Rennen, Part 1",Riesenslalom,Hoch-Ybrig,12,2025-01-25`
 
 **Final Output Constraint:**
--   You must **ONLY** provide the raw CSV data as your final response. Do not include any introductory text, explanations, summaries, or markdown formatting like ` ```csv`.
+-   You must **ONLY** provide the `=== <id> ===` lines and the raw CSV data as your final response. Do not include any introductory text, explanations, summaries, or markdown formatting like ` ```csv`.
 """
 
-USER_PROMPT_TEMPLATE = """Analyze the following document and extract the ski race results based on the criteria below.
+USER_PROMPT_TEMPLATE = """Analyze the following documents and extract the ski race results based on the criteria below.
 
 **Extraction Criteria:**
 Extract all results that meet **either** of the following conditions:
@@ -44,39 +71,109 @@ Extract all results that meet **either** of the following conditions:
 Generate the CSV output according to your system instructions.
 """
 
+# Label sent in front of each PDF, and the marker the model puts in front of each document's CSV block
+FILE_ID_LABEL = "--- FILE ID: {target_id} ---"
+RESULT_BLOCK_RE = re.compile(r"^=== (.+?) ===[ \t]*$", re.MULTILINE)
+# Opening and closing markdown code fences the model sometimes wraps its CSV output in
+MARKDOWN_FENCE_RE = re.compile(r"\A\s*```(?:csv)?[ \t]*\n?|\n?```\s*\Z")
+
 # --- API Key and Model Configuration ---
 api_key = os.environ.get("GEMINI_API_KEY")
-model = None
-if api_key:
+if not api_key:
+    print("Warning: GEMINI_API_KEY not set. Script can only run in dry-run mode.")
+
+@functools.lru_cache(maxsize=1)
+def get_model():
+    """
+    Creates the Gemini model on first use and returns it, or None without an API key.
+    The SDK is imported here because its import alone takes seconds, which dry runs don't need.
+    """
+    if not api_key:
+        return None
+    import google.generativeai as genai
     genai.configure(api_key=api_key)
     # The system_instruction is passed to the model at initialization.
-    model = genai.GenerativeModel(
+    return genai.GenerativeModel(
         'gemini-2.5-pro',
         system_instruction=SYSTEM_INSTRUCTION
     )
-else:
-    print("Warning: GEMINI_API_KEY not set. Script can only run in dry-run mode.")
 
 def load_json_file(file_path):
     """Loads a generic JSON file and returns its content."""
     print(f"Loading data from {os.path.basename(file_path)}...")
     try:
-        with open(file_path, 'r') as f:
-            return json.load(f)
+        with open(file_path, 'rb') as f:
+            return orjson.loads(f.read())
     except FileNotFoundError:
         print(f"Error: {file_path} not found.")
         return None
-    except json.JSONDecodeError:
+    except orjson.JSONDecodeError:
         print(f"Error: Could not decode JSON from {file_path}.")
         return None
 
 def save_crawl_targets(targets):
     """Saves the updated list of targets back to the JSON file."""
     print(f"Saving updated targets to {CRAWL_TARGETS_PATH}...")
-    with open(CRAWL_TARGETS_PATH, 'w') as f:
-        json.dump(targets, f, indent=2)
+    # Write to a temporary file first so an interrupted run can't leave a truncated file behind.
+    tmp_path = CRAWL_TARGETS_PATH.with_name(CRAWL_TARGETS_PATH.name + ".tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(orjson.dumps(targets, option=orjson.OPT_INDENT_2))
+    os.replace(tmp_path, CRAWL_TARGETS_PATH)
     print("Save successful.")
 
+def get_pdf_cache_key(url):
+    """Returns the name under which the PDF at url is cached, without the file extension."""
+    return hashlib.sha256(url.encode()).hexdigest()
+
+def download_pdf(url):
+    """
+    Downloads a PDF and returns its content, reusing the cached copy from a previous
+    run when the server reports that the file has not changed.
+    """
+    cache_key = get_pdf_cache_key(url)
+    cached_pdf_path = PDF_CACHE_DIR / f"{cache_key}.pdf"
+    cached_meta_path = PDF_CACHE_DIR / f"{cache_key}.json"
+
+    # Turn the request into a conditional GET if we already have a copy of the file
+    headers = {}
+    if os.path.exists(cached_pdf_path) and os.path.exists(cached_meta_path):
+        with open(cached_meta_path, 'rb') as f:
+            cached_meta = orjson.loads(f.read())
+        if cached_meta.get("etag"):
+            headers["If-None-Match"] = cached_meta["etag"]
+        if cached_meta.get("lastModified"):
+            headers["If-Modified-Since"] = cached_meta["lastModified"]
+
+    # Stream the response so that the body is only read once we know it is a PDF
+    with SESSION.get(url, headers=headers, stream=True, timeout=DOWNLOAD_TIMEOUT) as response:
+        if response.status_code == 304:
+            with open(cached_pdf_path, 'rb') as f:
+                return f.read()
+        response.raise_for_status()
+        # Results that aren't published yet can come back as an HTML page instead of a PDF
+        content_type = response.headers.get("Content-Type", "")
+        if content_type.startswith("text/"):
+            raise ValueError(f"Expected a PDF but received '{content_type}' content.")
+
+        # Only keep files the server gave us validators for, otherwise the cache can never be hit
+        etag = response.headers.get("ETag")
+        last_modified = response.headers.get("Last-Modified")
+        if not (etag or last_modified):
+            return response.content
+
+        # Stream the body to the cache in large chunks instead of first assembling it
+        # in memory, then write the metadata, so a metadata file always has a complete PDF next to it
+        tmp_pdf_path = cached_pdf_path.with_name(cached_pdf_path.name + ".tmp")
+        with open(tmp_pdf_path, 'wb') as f:
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                f.write(chunk)
+        os.replace(tmp_pdf_path, cached_pdf_path)
+        with open(cached_meta_path, 'wb') as f:
+            f.write(orjson.dumps({"url": url, "etag": etag, "lastModified": last_modified}))
+
+    with open(cached_pdf_path, 'rb') as f:
+        return f.read()
+
 def build_user_prompt(monitoring_targets):
     """Dynamically builds the user prompt from the template."""
     clubs_to_monitor = monitoring_targets.get('clubs', [])
@@ -99,95 +196,182 @@ def build_user_prompt(monitoring_targets):
         athletes_list=formatted_athletes
     )
 
-def print_prompt_for_dry_run(user_prompt, pdf_content):
+def is_within_crawl_window(valid_from_str, valid_until_str, now_iso):
+    """Checks whether the ISO 8601 timestamp now_iso lies inside a target's crawl window."""
+    # UTC timestamps in ISO 8601 notation order correctly as plain strings, so the
+    # window bounds only need to be parsed when they use a different UTC offset.
+    if valid_from_str.endswith("+00:00") and valid_until_str.endswith("+00:00"):
+        return valid_from_str <= now_iso <= valid_until_str
+    valid_from = datetime.fromisoformat(valid_from_str)
+    valid_until = datetime.fromisoformat(valid_until_str)
+    return valid_from <= datetime.fromisoformat(now_iso) <= valid_until
+
+def select_eligible_targets(targets, now_iso):
+    """
+    Returns up to MAX_TARGETS_PER_RUN targets that are queued or failed and whose
+    crawl window contains now_iso, in their original order.
+    """
+    eligible = (
+        target for target in targets
+        if target["status"] in ('queued', 'failed')
+        and is_within_crawl_window(target["crawlPolicy"]["validFrom"], target["crawlPolicy"]["validUntil"], now_iso)
+    )
+    return list(itertools.islice(eligible, MAX_TARGETS_PER_RUN))
+
+def prune_pdf_cache(targets, now_iso):
+    """
+    Removes the cached PDFs that won't be downloaded again. Only failed targets are
+    retried, and only while their crawl window is open.
+    """
+    cache_keys_to_keep = {
+        get_pdf_cache_key(target["url"]) for target in targets
+        if target["status"] == 'failed'
+        and is_within_crawl_window(target["crawlPolicy"]["validFrom"], target["crawlPolicy"]["validUntil"], now_iso)
+    }
+    removed_count = 0
+    with os.scandir(PDF_CACHE_DIR) as entries:
+        for entry in entries:
+            # Both the PDF and its metadata file are named after the cache key
+            if entry.name.split('.', 1)[0] not in cache_keys_to_keep:
+                os.remove(entry.path)
+                removed_count += 1
+    if removed_count:
+        print(f"Removed {removed_count} files that are no longer needed from the PDF cache.")
+
+def print_prompt_for_dry_run(user_prompt, documents):
     """Prints a readable version of the generated prompt for a dry run."""
-    print("\n--- DRY RUN: Generated Prompt ---")
-    print("\n[SYSTEM INSTRUCTION]")
-    print(SYSTEM_INSTRUCTION)
-    print("\n[USER PROMPT]")
-    print(user_prompt)
-    size_in_kb = round(len(pdf_content) / 1024, 2)
-    print(f"\n[PDF content ({size_in_kb} kB) would be attached here]")
-    print("---------------------------------\n")
-
-def process_target(target, monitoring_targets, is_dry_run=True):
+    lines = [
+        "\n--- DRY RUN: Generated Prompt ---",
+        "\n[SYSTEM INSTRUCTION]",
+        SYSTEM_INSTRUCTION,
+        "\n[USER PROMPT]",
+        user_prompt,
+    ]
+    for _, target_id, _, pdf_content in documents:
+        size_in_kb = round(len(pdf_content) / 1024, 2)
+        lines.append(f"\n{FILE_ID_LABEL.format(target_id=target_id)}")
+        lines.append(f"[PDF content ({size_in_kb} kB) would be attached here]")
+    lines.append("---------------------------------\n")
+    # Printed in one call so output from concurrent requests doesn't interleave.
+    print("\n".join(lines))
+
+def split_into_requests(documents):
+    """
+    Groups downloaded documents into Gemini requests of at most TARGETS_PER_REQUEST
+    documents, staying below the inline request size limit.
+    """
+    group, group_size = [], 0
+    for document in documents:
+        pdf_size = len(document[3])
+        if group and (len(group) >= TARGETS_PER_REQUEST or group_size + pdf_size > MAX_REQUEST_PDF_BYTES):
+            yield group
+            group, group_size = [], 0
+        group.append(document)
+        group_size += pdf_size
+    if group:
+        yield group
+
+def split_response_by_target(response_text):
+    """Splits a batched Gemini response into a dict of CSV blocks keyed by target ID."""
+    # re.split yields any text before the first marker, followed by alternating IDs and blocks
+    parts = RESULT_BLOCK_RE.split(response_text)
+    return {target_id.strip(): block for target_id, block in zip(parts[1::2], parts[2::2])}
+
+def request_results(documents, user_prompt, is_dry_run=True):
     """
-    Downloads, processes a single crawl target, and saves the result to the staging area.
-    Returns True on success and False on failure.
+    Sends the given documents to Gemini in a single request.
+    Returns the extracted CSV text per target ID.
     """
-    target_id = target.get("id")
-    url = target.get("url")
-    if not all([target_id, url]):
-        print(f"Skipping invalid target: {target}")
-        return False
+    target_ids = [target_id for _, target_id, _, _ in documents]
+    label = ", ".join(target_ids)
+
+    if is_dry_run:
+        print(f"[{label}] DRY RUN: Skipping Gemini API call.")
+        print_prompt_for_dry_run(user_prompt, documents)
+        response_text = "\n".join(
+            f"=== {target_id} ===\nName,Category,RaceName,Event,Location,Rank,Date\nJohn Doe,U16,Dry Run Race,Slalom,Dry Run Location,1,2025-01-01"
+            for target_id in target_ids
+        )
+    else:
+        model = get_model()
+        if not model:
+            raise RuntimeError("Live run requested, but Gemini model is not initialized.")
+
+        print(f"[{label}] LIVE RUN: Sending request to Gemini API...")
+        # The system instruction is already part of the model configuration.
+        # We only need to send the user-specific parts of the prompt, with each
+        # PDF preceded by its label so the results can be told apart.
+        prompt_parts = [user_prompt]
+        for _, target_id, _, pdf_content in documents:
+            prompt_parts.append(FILE_ID_LABEL.format(target_id=target_id))
+            prompt_parts.append({"mime_type": "application/pdf", "data": pdf_content})
+        response = model.generate_content(
+            prompt_parts,
+            generation_config={"response_mime_type": "text/plain"}
+        )
+        response_text = response.text
+        print(f"[{label}] Gemini API call successful.")
+
+    return split_response_by_target(response_text)
+
+def save_staging_csv(target_id, url, csv_from_ai):
+    """Cleans the CSV extracted for a target and saves it to the staging area."""
+    # Clean the response in case it's wrapped in a markdown block
+    cleaned_csv = MARKDOWN_FENCE_RE.sub("", csv_from_ai).strip()
+
+    # Write the CSV data straight to the staging file, adding the ResultUrl column on the way
+    staging_file_path = STAGING_DIR / f"{target_id}.csv"
+    with open(staging_file_path, "w", encoding='utf-8') as f:
+        if not cleaned_csv:
+            print(f"[{target_id}] Warning: Received empty or invalid CSV data from AI. Staging file will be empty.")
+        else:
+            lines = iter(cleaned_csv.splitlines())
+            f.write(next(lines).strip() + ",ResultUrl\n")
+            url_suffix = f",{url}\n"
+            for line in lines:
+                line = line.strip()
+                if line:  # Avoid adding empty lines
+                    f.write(line + url_suffix)
+    print(f"[{target_id}] Successfully saved results to {staging_file_path}")
+
+def download_target(target):
+    """Downloads the PDF of a crawl target. Returns its content, or None on failure."""
+    target_id = target["id"]
+    url = target["url"]
 
     print(f"\n--- Processing Target ID: {target_id} ---")
     try:
-        print(f"Downloading PDF from {url}...")
-        response = requests.get(url)
-        response.raise_for_status()
-        pdf_content = response.content
-        pdf_file = {"mime_type": "application/pdf", "data": pdf_content}
-        print("Download successful.")
-
-        csv_from_ai = ""
-        user_prompt = build_user_prompt(monitoring_targets)
-
-        if is_dry_run:
-            print("DRY RUN: Skipping Gemini API call.")
-            print_prompt_for_dry_run(user_prompt, pdf_content)
-            csv_from_ai = "Name,Category,RaceName,Event,Location,Rank,Date\nJohn Doe,U16,Dry Run Race,Slalom,Dry Run Location,1,2025-01-01"
-        else:
-            if not model:
-                print("Error: Live run requested, but Gemini model is not initialized.")
-                return False
-
-            print("LIVE RUN: Sending request to Gemini API...")
-            # The system instruction is already part of the model configuration.
-            # We only need to send the user-specific parts of the prompt.
-            prompt_parts = [user_prompt, pdf_file]
-            response = model.generate_content(
-                prompt_parts,
-                generation_config={"response_mime_type": "text/plain"}
-            )
-            csv_from_ai = response.text
-            print("Gemini API call successful.")
-
-        # Clean the response in case it's wrapped in a markdown block
-        cleaned_csv = csv_from_ai.strip()
-        if cleaned_csv.startswith("```csv"):
-            cleaned_csv = cleaned_csv.lstrip("```csv\n")
-        elif cleaned_csv.startswith("```"):
-            cleaned_csv = cleaned_csv.lstrip("```\n")
-        
-        if cleaned_csv.endswith("```"):
-            cleaned_csv = cleaned_csv.rstrip("\n```")
-        
-        cleaned_csv = cleaned_csv.strip()
-
-        # Post-process the CSV data to add the ResultUrl column
-        lines = cleaned_csv.split('\n')
-        csv_output = ""
-        if not lines or not lines[0]:
-            print("Warning: Received empty or invalid CSV data from AI. Staging file will be empty.")
-        else:
-            header = lines[0].strip() + ",ResultUrl"
-            rows = [header]
-            for line in lines[1:]:
-                if line.strip():  # Avoid adding empty lines
-                    rows.append(line.strip() + f",{url}")
-            csv_output = "\n".join(rows) + "\n"
-
-        os.makedirs(STAGING_DIR, exist_ok=True)
-        staging_file_path = os.path.join(STAGING_DIR, f"{target_id}.csv")
-        with open(staging_file_path, "w", encoding='utf-8') as f:
-            f.write(csv_output)
-        print(f"Successfully saved results to {staging_file_path}")
-        return True
-
+        print(f"[{target_id}] Downloading PDF from {url}...")
+        pdf_content = download_pdf(url)
+        print(f"[{target_id}] Download successful.")
+        return pdf_content
     except Exception as e:
         print(f"An error occurred while processing {target_id}: {e}")
-        return False
+        return None
+
+def process_request(documents, user_prompt, is_dry_run=True):
+    """
+    Extracts the results of the given documents with a single Gemini request and saves
+    one staging file per target. Returns the indexes of the documents that were saved.
+    """
+    try:
+        csv_by_target = request_results(documents, user_prompt, is_dry_run)
+    except Exception as e:
+        target_ids = ", ".join(target_id for _, target_id, _, _ in documents)
+        print(f"An error occurred while processing {target_ids}: {e}")
+        return []
+
+    saved_indexes = []
+    for index, target_id, url, _ in documents:
+        if target_id not in csv_by_target:
+            print(f"[{target_id}] Error: The Gemini response did not contain a result block for this target.")
+            continue
+        try:
+            save_staging_csv(target_id, url, csv_by_target[target_id])
+            saved_indexes.append(index)
+        except Exception as e:
+            print(f"An error occurred while processing {target_id}: {e}")
+    return saved_indexes
 
 def main():
     """Main function to parse arguments and run the crawler."""
@@ -206,53 +390,79 @@ def main():
     crawl_targets = load_json_file(CRAWL_TARGETS_PATH)
     monitoring_targets = load_json_file(MONITORING_TARGETS_PATH)
 
-    if not crawl_targets or not monitoring_targets:
+    crawl_target_schema = load_json_file(CRAWL_TARGET_SCHEMA_PATH)
+
+    if not crawl_targets or not monitoring_targets or not crawl_target_schema:
         print("Could not load necessary target files. Exiting.")
         return
+
+    # Validate the targets once up front, so the rest of the run can rely on their structure.
+    # fastjsonschema compiles the schema into plain Python code, which keeps this cheap.
+    validate_crawl_target = fastjsonschema.compile(crawl_target_schema)
+    valid_targets = []
+    for target in crawl_targets:
+        try:
+            valid_targets.append(validate_crawl_target(target))
+        except fastjsonschema.JsonSchemaValueException as e:
+            print(f"Skipping invalid target ({e.message}): {target}")
     
-    now_utc = datetime.now(timezone.utc)
+    # The prompt and staging directory are the same for every target in this run.
+    user_prompt = build_user_prompt(monitoring_targets)
+    os.makedirs(STAGING_DIR, exist_ok=True)
+    os.makedirs(PDF_CACHE_DIR, exist_ok=True)
+
+    if not is_dry_run:
+        # Create the model before the worker threads start using it.
+        get_model()
+
+    now_iso = datetime.now(timezone.utc).isoformat()
     
-    processed_count = 0
-    for target in crawl_targets:
-        if processed_count >= 10:
-            print("Processed 10 targets, stopping for now.")
-            break
-
-        target_id = target.get("id")
-        status = target.get("status")
-        policy = target.get("crawlPolicy", {})
-        
-        if status not in ['queued', 'failed']:
-            print(f"\nSkipping target {target_id}: status is '{status}'.")
-            continue
-            
-        valid_from_str = policy.get('validFrom')
-        valid_until_str = policy.get('validUntil')
-        
-        if valid_from_str and valid_until_str:
-            valid_from = datetime.fromisoformat(valid_from_str)
-            valid_until = datetime.fromisoformat(valid_until_str)
-            
-            if not (valid_from <= now_utc <= valid_until):
-                print(f"\nSkipping target {target_id}: current time is outside the valid crawl window.")
-                continue
-
-        success = process_target(target, monitoring_targets, is_dry_run)
-        processed_count += 1
-
-        if not is_dry_run:
-            now_iso = now_utc.isoformat()
+    # Collect the eligible targets first so they can be processed concurrently.
+    eligible_targets = select_eligible_targets(valid_targets, now_iso)
+    print(f"Found {len(eligible_targets)} eligible targets (at most {MAX_TARGETS_PER_RUN} per run).")
+
+    # Threads release the GIL while waiting on the network, so the downloads run
+    # concurrently instead of back to back. They get their own, wider pool so that
+    # requests can be built from the PDFs that were actually downloaded.
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_DOWNLOADS) as executor:
+        pdf_contents = list(executor.map(download_target, eligible_targets))
+    documents = [
+        (index, target["id"], target["url"], pdf_content)
+        for index, (target, pdf_content) in enumerate(zip(eligible_targets, pdf_contents))
+        if pdf_content is not None
+    ]
+
+    # Sending several PDFs per request means the system instruction and prompt
+    # are only paid for once per request instead of once per target.
+    results = [False] * len(eligible_targets)
+    with ThreadPoolExecutor(max_workers=MAX_CONCURRENT_REQUESTS) as executor:
+        saved_indexes = executor.map(
+            lambda request_documents: process_request(request_documents, user_prompt, is_dry_run),
+            split_into_requests(documents)
+        )
+        for index in (index for request_indexes in saved_indexes for index in request_indexes):
+            results[index] = True
+
+    if not is_dry_run:
+        for target, success in zip(eligible_targets, results):
             target['tracking']['lastAttemptAt'] = now_iso
             target['tracking']['updatedAt'] = now_iso
-            target['tracking']['attemptCount'] = target.get('tracking', {}).get('attemptCount', 0) + 1
+            target['tracking']['attemptCount'] += 1
             if success:
                 target['status'] = 'processed'
                 target['tracking']['succeededAt'] = now_iso
             else:
                 target['status'] = 'failed'
+
+    # Targets that succeeded (or, in a dry run, were never attempted) don't need their PDFs kept
+    prune_pdf_cache(valid_targets, now_iso)
     
     if not is_dry_run:
-        save_crawl_targets(crawl_targets)
+        # Most scheduled runs find nothing to do, so only rewrite the file when targets changed
+        if eligible_targets:
+            save_crawl_targets(crawl_targets)
+        else:
+            print("No targets were attempted. Crawl targets are unchanged.")
     
     print("\n--- Crawl process finished. ---")
 
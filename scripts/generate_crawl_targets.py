@@ -1,14 +1,31 @@
 import os
 import pandas as pd
-import json
+import orjson
 from datetime import datetime, timezone
-from dateutil.relativedelta import relativedelta
+from _paths import PROCESSED_CSV_PATH, CRAWL_TARGETS_JSON_PATH
 
-# --- Configuration ---
-# Define file paths using the project's directory structure
-project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-PROCESSED_CSV_PATH = os.path.join(project_dir, "data", "kwo_terminkalender_2025_processed.csv")
-CRAWL_TARGETS_JSON_PATH = os.path.join(project_dir, "data", "crawl_targets_2025.json")
+def build_crawl_target(v_nr, url, event_date_str, valid_from_iso, valid_until_iso, now_utc_iso):
+    """Assembles a single crawl target object according to the schema."""
+    return {
+        "id": f"kwo2025-{v_nr}",
+        "url": url,
+        "status": "queued",
+        "event": {
+            "startDate": event_date_str,
+            "endDate": event_date_str
+        },
+        "crawlPolicy": {
+            "validFrom": valid_from_iso,
+            "validUntil": valid_until_iso
+        },
+        "tracking": {
+            "createdAt": now_utc_iso,
+            "updatedAt": now_utc_iso,
+            "attemptCount": 0,
+            "lastAttemptAt": None,
+            "succeededAt": None
+        }
+    }
 
 def create_crawl_targets():
     """
@@ -19,60 +36,46 @@ def create_crawl_targets():
     print(f"Reading processed data from: {os.path.basename(PROCESSED_CSV_PATH)}")
 
     try:
-        # Read the processed CSV file
-        df = pd.read_csv(PROCESSED_CSV_PATH, delimiter=';')
+        # Read the processed CSV file with pyarrow's multithreaded parser. Only the columns
+        # used below are read, and they get explicit types instead of being inferred.
+        df = pd.read_csv(
+            PROCESSED_CSV_PATH,
+            delimiter=';',
+            engine='pyarrow',
+            dtype_backend='pyarrow',
+            usecols=['V-Nr', 'Datum', 'url'],
+            dtype={'V-Nr': 'int32', 'Datum': 'string', 'url': 'string'}
+        )
     except FileNotFoundError:
         print(f"Error: Processed file not found at {PROCESSED_CSV_PATH}. Please run the crawl_target_creator.py script first.")
         return
 
-    crawl_targets = []
     now_utc_iso = datetime.now(timezone.utc).isoformat()
 
-    # Iterate over each row in the DataFrame to build the target list
-    for index, row in df.iterrows():
-        try:
-            # Ensure 'Datum' is a string and parse it
-            event_date_str = str(row['Datum'])
-            event_date = datetime.strptime(event_date_str, '%Y-%m-%d')
-            
-            # Define the crawl window
-            valid_from = event_date.replace(tzinfo=timezone.utc)
-            valid_until = (valid_from + relativedelta(years=1)).replace(second=59, minute=59, hour=23)
+    # Parse and format all event dates in one vectorized pass instead of per row
+    event_dates = pd.to_datetime(df['Datum'].astype(str), format='%Y-%m-%d', errors='coerce', utc=True)
+    for index in df.index[event_dates.isna()]:
+        print(f"Warning: Could not process row {index}. Invalid date format or value: {df.at[index, 'Datum']}")
+    df, event_dates = df[event_dates.notna()], event_dates.dropna()
 
+    # Define the crawl window
+    valid_until = (event_dates + pd.DateOffset(years=1)).dt.normalize() + pd.Timedelta(hours=23, minutes=59, seconds=59)
+    event_date_strs = event_dates.dt.strftime('%Y-%m-%d')
+    valid_from_isos = event_dates.dt.strftime('%Y-%m-%dT%H:%M:%S+00:00')
+    valid_until_isos = valid_until.dt.strftime('%Y-%m-%dT%H:%M:%S+00:00')
 
-            # Create the unique ID for the target
-            target_id = f"kwo2025-{row['V-Nr']}"
-
-            # Assemble the crawl target object
-            target = {
-                "id": target_id,
-                "url": row['url'],
-                "status": "queued",
-                "event": {
-                    "startDate": event_date.strftime('%Y-%m-%d'),
-                    "endDate": event_date.strftime('%Y-%m-%d')
-                },
-                "crawlPolicy": {
-                    "validFrom": valid_from.isoformat(),
-                    "validUntil": valid_until.isoformat()
-                },
-                "tracking": {
-                    "createdAt": now_utc_iso,
-                    "updatedAt": now_utc_iso,
-                    "attemptCount": 0,
-                    "lastAttemptAt": None,
-                    "succeededAt": None
-                }
-            }
-            crawl_targets.append(target)
-        except (ValueError, TypeError) as e:
-            print(f"Warning: Could not process row {index}. Invalid date format or value. Error: {e}")
-            continue
+    # Build the target list from plain column values rather than per-row Series
+    crawl_targets = [
+        build_crawl_target(v_nr, url, event_date_str, valid_from_iso, valid_until_iso, now_utc_iso)
+        for v_nr, url, event_date_str, valid_from_iso, valid_until_iso in zip(
+            df['V-Nr'], df['url'], event_date_strs, valid_from_isos, valid_until_isos
+        )
+    ]
 
     # Save the list of targets to a JSON file
     print(f"Generated {len(crawl_targets)} crawl targets.")
-    with open(CRAWL_TARGETS_JSON_PATH, 'w') as f:
-        json.dump(crawl_targets, f, indent=2)
+    with open(CRAWL_TARGETS_JSON_PATH, 'wb') as f:
+        f.write(orjson.dumps(crawl_targets, option=orjson.OPT_INDENT_2))
 
     print(f"Successfully saved crawl targets to {os.path.basename(CRAWL_TARGETS_JSON_PATH)}")
     print(f"--- Crawl Target Generation Finished ---")
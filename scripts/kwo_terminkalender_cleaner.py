@@ -1,49 +1,163 @@
-import os
 import pandas as pd
 import requests
 import hashlib
+import orjson
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from _paths import KWO_TERMINKALENDER_CSV_PATH, PROCESSED_CSV_PATH, FILE_HASH_CACHE_PATH
 
-project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-KWO_TERMINKALENDER_CSV_PATH = os.path.join(project_dir, "data", "kwo_terminkalender_2025.csv")
-PROCESSED_CSV_PATH = os.path.join(project_dir, "data", "kwo_terminkalender_2025_processed.csv")
+# Number of files downloaded in parallel
+MAX_WORKERS = 16
+# Read size for streamed downloads
+DOWNLOAD_CHUNK_SIZE = 64 * 1024
+# The result PDF of an event is found at RESULTS_URL_PREFIX + V-Nr + RESULTS_URL_SUFFIX
+RESULTS_URL_PREFIX = 'https://www.swiss-ski-kwo.ch/tk/ranglisten/2025/'
+RESULTS_URL_SUFFIX = '.pdf'
+
+# A single session shared by all download threads keeps the connections to the server alive
+session = requests.Session()
+session.mount('https://', HTTPAdapter(
+    pool_connections=32,
+    pool_maxsize=32,
+    max_retries=Retry(total=3, backoff_factor=0.3)
+))
 
 
 # Read the CSV file into a pandas DataFrame
 # Make sure to use a semicolon ';' as the delimiter if that's what your CSV uses
 df = pd.read_csv(KWO_TERMINKALENDER_CSV_PATH, delimiter=';')
 
+# Rows with the same V-Nr point to the same PDF, so keep only the first one
+# before any requests are made
+df = df.drop_duplicates(subset=['V-Nr']).reset_index(drop=True)
+
 # Create a new 'url' column by formatting the 'V-Nr' column
-# This creates the URL in the format you requested
-df['url'] = df['V-Nr'].apply(lambda x: f'https://www.swiss-ski-kwo.ch/tk/ranglisten/2025/{x}.pdf')
+# This creates the URL in the format you requested, using a vectorized string
+# concatenation instead of calling a Python function per row
+df['url'] = RESULTS_URL_PREFIX + df['V-Nr'].astype(str) + RESULTS_URL_SUFFIX
 
 # --- New Duplicate Detection Logic ---
 
 # A dictionary to store hashes of downloaded files to detect duplicates.
-# Key: hash, Value: URL
+# Key: hash digest (bytes), Value: URL
 seen_file_hashes = {}
 rows_to_keep = []
 
-for index, row in df.iterrows():
-    url = row['url']
+# Hashes computed in previous runs, so unchanged files don't have to be downloaded again.
+# Key: V-Nr, Value: ETag, Content-Length and hash of the file
+try:
+    with open(FILE_HASH_CACHE_PATH, 'rb') as f:
+        file_hash_cache = orjson.loads(f.read())
+except FileNotFoundError:
+    file_hash_cache = {}
+
+def fetch_file_headers(url):
+    """Returns the (ETag, Content-Length) headers of a file, or None if the server doesn't send both."""
     try:
-        # Download the PDF content
-        response = requests.get(url, timeout=10) # Added a timeout for safety
-        response.raise_for_status()  # Raise an HTTPError for bad responses (4xx or 5xx)
-
-        # Calculate the hash of the file content
-        file_hash = hashlib.md5(response.content).hexdigest()
-
-        # If we haven't seen this hash before, add it to our dictionary and keep the row
-        if file_hash not in seen_file_hashes:
-            seen_file_hashes[file_hash] = url
-            rows_to_keep.append(index)
-            print(f"Keeping: {url} (hash: {file_hash})")
-        else:
-            print(f"Skipping duplicate: {url} (same content as: {seen_file_hashes[file_hash]})")
+        response = session.head(url, timeout=5, allow_redirects=True)
+        response.raise_for_status()
+    except requests.exceptions.RequestException:
+        # The download below will report the error
+        return None
+    etag = response.headers.get('ETag')
+    content_length = response.headers.get('Content-Length')
+    if etag and content_length:
+        return (etag, content_length)
+    return None
+
+def fetch_file_hash(url):
+    """Downloads a file and returns the hash of its content, or None if the download failed."""
+    try:
+        # Stream the PDF content and hash it chunk by chunk, so the whole file
+        # never has to be held in memory
+        with session.get(url, stream=True, timeout=10) as response: # Added a timeout for safety
+            response.raise_for_status()  # Raise an HTTPError for bad responses (4xx or 5xx)
+            # SHA-256 is hardware-accelerated on current CPUs, so it is faster than MD5
+            file_hash = hashlib.sha256()
+            for chunk in response.iter_content(chunk_size=DOWNLOAD_CHUNK_SIZE):
+                file_hash.update(chunk)
+        return file_hash.digest()
 
     except requests.exceptions.RequestException as e:
         print(f"Error downloading {url}: {e}. Skipping this URL.")
         # Decide if you want to keep rows that failed to download. Here, we are dropping them.
+        return None
+
+urls = df['url'].tolist()
+v_nrs = df['V-Nr'].astype(str).tolist()
+
+with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+    # Ask for the headers first. URLs with the same ETag and size serve the same file, so only
+    # one URL of each such group has to be downloaded. Key: headers, Value: positions in row order
+    file_headers = list(executor.map(fetch_file_headers, urls))
+    header_groups = []
+    group_of_headers = {}
+    for position, headers in enumerate(file_headers):
+        if headers is None:
+            header_groups.append([position])
+        elif headers in group_of_headers:
+            group_of_headers[headers].append(position)
+        else:
+            group_of_headers[headers] = [position]
+            header_groups.append(group_of_headers[headers])
+
+    # Hash the first row of every group. If its download fails, the next row of the group is
+    # tried in the next round, so a group only skips rows once one of its files has a hash.
+    file_hashes = [None] * len(urls)
+    groups_to_try = [iter(group) for group in header_groups]
+    while groups_to_try:
+        downloads = []
+        for remaining_positions in groups_to_try:
+            position = next(remaining_positions, None)
+            if position is None:
+                # Every file of this group failed to download
+                continue
+            # Reuse the cached hash of a file if its ETag and size haven't changed since the last run
+            cached = file_hash_cache.get(v_nrs[position])
+            if cached is not None and file_headers[position] == (cached['etag'], cached['contentLength']):
+                file_hashes[position] = bytes.fromhex(cached['hash'])
+            else:
+                downloads.append((position, remaining_positions))
+
+        # Download and hash the files of this round in parallel
+        downloaded_hashes = executor.map(fetch_file_hash, [urls[position] for position, _ in downloads])
+        groups_to_try = []
+        for (position, remaining_positions), file_hash in zip(downloads, downloaded_hashes):
+            file_hashes[position] = file_hash
+            if file_hash is None:
+                groups_to_try.append(remaining_positions)
+            elif file_headers[position] is not None:
+                etag, content_length = file_headers[position]
+                file_hash_cache[v_nrs[position]] = {"etag": etag, "contentLength": content_length, "hash": file_hash.hex()}
+
+# The rows after the hashed row of a group serve the same file as that row
+same_headers_as = [None] * len(urls)
+for group in header_groups:
+    for group_index, position in enumerate(group):
+        if file_hashes[position] is not None:
+            for later_position in group[group_index + 1:]:
+                same_headers_as[later_position] = urls[position]
+            break
+
+with open(FILE_HASH_CACHE_PATH, 'wb') as f:
+    f.write(orjson.dumps(file_hash_cache, option=orjson.OPT_INDENT_2))
+
+# Walk the plain column values instead of building a Series per row with iterrows()
+for index, url, file_hash, original_url in zip(df.index, urls, file_hashes, same_headers_as):
+    if original_url is not None:
+        print(f"Skipping duplicate: {url} (same ETag and size as: {original_url})")
+        continue
+    if file_hash is None:
+        continue
+
+    # If we haven't seen this hash before, add it to our dictionary and keep the row
+    if file_hash not in seen_file_hashes:
+        seen_file_hashes[file_hash] = url
+        rows_to_keep.append(index)
+        print(f"Keeping: {url} (hash: {file_hash.hex()})")
+    else:
+        print(f"Skipping duplicate: {url} (same content as: {seen_file_hashes[file_hash]})")
 
 # Filter the DataFrame to keep only the unique rows
 df_processed = df.loc[rows_to_keep]
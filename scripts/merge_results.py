@@ -1,11 +1,13 @@
 import os
 import pandas as pd
+from _paths import STAGING_DIR, MASTER_CSV_PATH
 
-# --- Configuration ---
-# Define file paths using the project's directory structure
-project_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
-STAGING_DIR = os.path.join(project_dir, "data", "staging")
-MASTER_CSV_PATH = os.path.join(project_dir, "data", "ski-data.csv")
+def write_master_csv(df):
+    """Overwrites the master CSV file with the given DataFrame."""
+    # Write to a temporary file first so a failed write can't leave a truncated master file behind.
+    tmp_path = MASTER_CSV_PATH.with_name(MASTER_CSV_PATH.name + ".tmp")
+    df.to_csv(tmp_path, index=False)
+    os.replace(tmp_path, MASTER_CSV_PATH)
 
 def merge_staging_files():
     """
@@ -19,31 +21,32 @@ def merge_staging_files():
         print(f"Staging directory not found at {STAGING_DIR}. No files to merge.")
         # Create an empty master file if it doesn't exist
         if not os.path.exists(MASTER_CSV_PATH):
-             pd.DataFrame().to_csv(MASTER_CSV_PATH, index=False)
+             write_master_csv(pd.DataFrame())
         return
 
-    staging_files = [f for f in os.listdir(STAGING_DIR) if f.endswith('.csv')]
+    # scandir gives the name, path and file type of each entry from the directory listing itself
+    with os.scandir(STAGING_DIR) as entries:
+        staging_files = [entry for entry in entries if entry.name.endswith('.csv') and entry.is_file()]
     if not staging_files:
         print("No CSV files found in the staging directory. The master file will be cleared.")
         # Overwrite with an empty DataFrame to clear it
-        pd.DataFrame().to_csv(MASTER_CSV_PATH, index=False)
+        write_master_csv(pd.DataFrame())
         return
 
     print(f"Found {len(staging_files)} CSV files to process in staging directory.")
     
     # 2. Read all staging files into a list of DataFrames
     all_dataframes = []
-    for filename in staging_files:
-        staging_file_path = os.path.join(STAGING_DIR, filename)
+    for entry in staging_files:
         try:
-            df = pd.read_csv(staging_file_path)
+            df = pd.read_csv(entry.path)
             all_dataframes.append(df)
         except Exception as e:
-            print(f"Warning: Could not read or process {filename}: {e}. Skipping this file.")
+            print(f"Warning: Could not read or process {entry.name}: {e}. Skipping this file.")
 
     if not all_dataframes:
         print("No valid data could be read from staging files. Master file will be cleared.")
-        pd.DataFrame().to_csv(MASTER_CSV_PATH, index=False)
+        write_master_csv(pd.DataFrame())
         print("--- Merge Process Finished ---")
         return
 
@@ -68,7 +71,7 @@ def merge_staging_files():
         print("Sorting data by Date, RaceName, and Name.")
     
     # 6. Overwrite the master CSV file
-    master_df.to_csv(MASTER_CSV_PATH, index=False)
+    write_master_csv(master_df)
     print(f"Successfully overwrote {os.path.basename(MASTER_CSV_PATH)} with {len(master_df)} unique records.")
 
     print("--- Merge Process Finished ---")